@@ -11,6 +11,8 @@
 # =========================================================================
 
 import subprocess
+import select
+import signal
 import time
 import os
 
@@ -32,6 +34,9 @@ PROCESSES = [
     ("Web Server", "web_ui/app_server.py"),
 ]
 
+# Seconds to wait for children to exit after SIGTERM before sending SIGKILL
+SHUTDOWN_TIMEOUT = 5.0
+
 def launch_processes():
     """Launches all configured processes concurrently using subprocess.Popen."""
     
@@ -40,10 +45,6 @@ def launch_processes():
     print("--- Kabot I Mission Control Startup ---")
     print(f"Launching {len(PROCESSES)} critical processes...")
 
-    # Redirect all stdout/stderr output from subprocesses to null to prevent 
-    # terminal artifacts from corrupting logs or memory.
-    DEVNULL = open(os.devnull, 'w')
-    
     for name, script_path in PROCESSES:
         try:
             # Construct the command: python3 /path/to/script.py
@@ -52,15 +53,19 @@ def launch_processes():
             # Use Popen to launch the process and detach it
             process = subprocess.Popen(
                 command, 
-                stdout=DEVNULL, # Silence all output
-                stderr=DEVNULL, # Silence all errors (errors are logged internally by loggers if FLIGHT_MODE=False)
+                # Redirect all stdout/stderr output from subprocesses to null to prevent 
+                # terminal artifacts from corrupting logs or memory.
+                stdout=subprocess.DEVNULL, # Silence all output
+                stderr=subprocess.DEVNULL, # Silence all errors (errors are logged internally by loggers if FLIGHT_MODE=False)
                 # Run from the project root directory
-                cwd=os.path.dirname(os.path.abspath(__file__))
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                # Own session/process group: a terminal Ctrl+C reaches only the 
+                # launcher, which then shuts the children down in order.
+                start_new_session=True
             )
             
             running_processes.append((name, process))
             print(f"[SUCCESS] Launched {name} (PID: {process.pid})")
-            time.sleep(0.5) # Slight delay to ensure clean startup order
 
         except FileNotFoundError:
             print(f"[ERROR] Python interpreter not found.")
@@ -81,32 +86,106 @@ def launch_processes():
     else:
         print("No processes were launched. Mission aborted.")
 
+def report_exit(name, proc):
+    """Prints the alert for a child process that has terminated."""
+    print(f"\n[ALERT] Process '{name}' (PID: {proc.pid}) has terminated unexpectedly!")
+
+def watch_with_pidfds(processes):
+    """
+    Blocks in a single epoll instance on one pidfd per child, so the launcher 
+    sleeps in the kernel and wakes only when a child actually exits.
+    Raises AttributeError/OSError if pidfds are unavailable (Linux < 5.3).
+    """
+    fd_map = {}
+    try:
+        for name, proc in processes:
+            fd_map[os.pidfd_open(proc.pid)] = (name, proc)
+    except (AttributeError, OSError):
+        for fd in fd_map:
+            os.close(fd)
+        raise
+
+    ep = select.epoll()
+    try:
+        for fd in fd_map:
+            ep.register(fd, select.EPOLLIN)
+
+        while fd_map:
+            for fd, _ in ep.poll():
+                name, proc = fd_map.pop(fd)
+                ep.unregister(fd)
+                os.close(fd)
+                proc.wait() # Reap the child so it does not linger as a zombie
+                report_exit(name, proc)
+    finally:
+        ep.close()
+        for fd in fd_map:
+            os.close(fd)
+
+def watch_with_polling(processes):
+    """
+    Fallback for older kernels: a single waitid() call every 5 seconds reports 
+    any exited child, instead of one poll() per child per tick.
+    """
+    by_pid = {proc.pid: (name, proc) for name, proc in processes}
+    while by_pid:
+        # WNOWAIT leaves the child waitable so Popen can reap it via poll()
+        info = os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+        if info is None:
+            time.sleep(5) # Check status every 5 seconds
+            continue
+
+        entry = by_pid.pop(info.si_pid, None)
+        if entry is None:
+            os.waitpid(info.si_pid, 0) # Not one of ours; reap it so waitid moves on
+            continue
+
+        name, proc = entry
+        proc.poll()
+        report_exit(name, proc)
+
+def stop_processes(processes, timeout=SHUTDOWN_TIMEOUT):
+    """
+    Sends SIGTERM to every child at once, then waits for all of them against a 
+    single shared deadline. Children still alive afterwards are killed, so 
+    shutdown takes max(child exit time) instead of the sum, and leaves no zombies.
+    """
+    stopping = []
+    for name, proc in processes:
+        if proc.poll() is None: # Only try to terminate if still running
+            try:
+                os.killpg(proc.pid, signal.SIGTERM) # Signal the logger's whole process group
+                stopping.append((name, proc))
+            except Exception as e:
+                print(f"[ERROR] Could not terminate {name}: {e}")
+
+    deadline = time.monotonic() + timeout
+    for name, proc in stopping:
+        try:
+            proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+            print(f"[STOPPED] {name} (PID: {proc.pid})")
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+            print(f"[KILLED] {name} (PID: {proc.pid}) did not stop within {timeout:.0f}s")
+
 def monitor_processes(processes):
     """Monitors the launched processes and cleans up on keyboard interrupt."""
     try:
-        while True:
-            # Simple check to see if any process died
-            for name, proc in processes:
-                if proc.poll() is not None: # poll returns exit code if process terminated
-                    print(f"\n[ALERT] Process '{name}' (PID: {proc.pid}) has terminated unexpectedly!")
-                    # You could re-launch here, but for a simple mission, an alert is enough.
-                    
-            time.sleep(5) # Check status every 5 seconds
+        try:
+            watch_with_pidfds(processes)
+        except (AttributeError, OSError):
+            watch_with_polling(processes)
+
+        print("\nAll Kabot I payload processes have terminated.")
             
     except KeyboardInterrupt:
         print("\n\n--- TERMINATION SEQUENCE INITIATED ---")
         print("Stopping all running Kabot I payload processes...")
         
-        for name, proc in processes:
-            if proc.poll() is None: # Only try to terminate if still running
-                try:
-                    proc.terminate()
-                    print(f"[STOPPED] {name} (PID: {proc.pid})")
-                except Exception as e:
-                    print(f"[ERROR] Could not terminate {name}: {e}")
+        stop_processes(processes)
 
         print("\nMission components safely shut down. Data logging is complete.")
-        DEVNULL.close()
 
 if __name__ == "__main__":
     launch_processes()
@@ -0,0 +1,97 @@
+# =========================================================================
+# Kabot-1 Logger Helpers
+# =========================================================================
+# Shared by the DHT and MPU-6050 loggers, which import it as a sibling
+# module (their own directory is on sys.path when run as scripts). Each
+# logger is its own process, so the state below is per logger.
+# =========================================================================
+
+import json
+import os
+import time
+
+# Compact live-JSON serialiser returning bytes: orjson when it is installed
+# (several times faster than the stdlib), otherwise json with no whitespace
+try:
+    import orjson
+    dumps_compact = orjson.dumps
+except ImportError:
+    def dumps_compact(obj):
+        return json.dumps(obj, separators=(',', ':')).encode()
+
+# Central file for real-time monitoring dashboard (relative to src/logger/)
+LIVE_DATA_FILE = os.path.join("data", "LATEST_SENSOR_DATA.json")
+
+# Last known contents of the live data file and the mtime they were read at
+_live_cache = {}
+_live_mtime = None
+
+# Log lines are collected in memory and written + fsynced in one go once
+# LOG_FLUSH_BYTES (one SD page) have accumulated or the logger's flush
+# interval has passed, instead of one small write per sample
+LOG_FLUSH_BYTES = 4096
+_pending = bytearray()
+_last_flush = time.monotonic()
+
+def write_live_data(fields, tmp_file, flight_mode):
+    """
+    Merges fields into the shared live data file for the web UI. The file is
+    only re-parsed when another logger has changed it since our last write;
+    otherwise the cached copy is updated in place. The new contents go to
+    tmp_file, private to the calling logger, which is renamed over the live
+    file so readers never see a half-written JSON document.
+    """
+    global _live_mtime
+
+    # 1. Pick up the other loggers' fields only if the file changed under us
+    try:
+        mtime = os.stat(LIVE_DATA_FILE).st_mtime_ns
+        if mtime != _live_mtime:
+            with open(LIVE_DATA_FILE, 'r') as f:
+                latest = json.load(f)
+            _live_cache.clear()
+            _live_cache.update(latest)
+    except Exception:
+        # Missing or unreadable file: keep whatever we have cached
+        pass
+
+    # 2. Update this logger's fields
+    _live_cache.update(fields)
+
+    # 3. Atomically replace the file with the complete, updated data structure
+    try:
+        # Serialise up front and hand it over in one write(); json.dump would
+        # issue a small write per token. Compact in flight, readable on the bench.
+        if flight_mode:
+            payload = dumps_compact(_live_cache)
+        else:
+            payload = json.dumps(_live_cache, indent=4).encode()
+        with open(tmp_file, 'wb') as f:
+            f.write(payload)
+            # fstat on the open descriptor: no path lookup, and the mtime is
+            # that of our own file even if the other logger renames over it
+            # right after us (a later stat() would miss its update)
+            mtime = os.fstat(f.fileno()).st_mtime_ns
+        os.replace(tmp_file, LIVE_DATA_FILE)
+        _live_mtime = mtime
+    except Exception as e:
+        # Fail silently in flight mode
+        if not flight_mode:
+            print(f"Error writing live data JSON: {e}")
+
+def append_log(line):
+    """Queues one encoded log line for the next flush_log()."""
+    _pending.extend(line)
+
+def flush_due(interval):
+    """True once LOG_FLUSH_BYTES are pending or interval seconds have passed since the last flush."""
+    return len(_pending) >= LOG_FLUSH_BYTES or time.monotonic() - _last_flush >= interval
+
+def flush_log(log_fd):
+    """Writes all pending log lines with a single write() and fsyncs them."""
+    global _last_flush
+    if _pending:
+        os.write(log_fd, _pending)
+        os.fsync(log_fd)
+        _pending.clear()
+    _last_flush = time.monotonic()
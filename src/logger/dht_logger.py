@@ -7,7 +7,17 @@ import Adafruit_DHT
 import time
 from datetime import datetime
 import os
-import json # New import for JSON output
+import shutil
+import queue
+import threading
+import signal
+from _common import LIVE_DATA_FILE, write_live_data, append_log, flush_due, flush_log
+
+# pigpio is optional: without it the DHT11 is bit-banged by Adafruit_DHT
+try:
+    import pigpio
+except ImportError:
+    pigpio = None
 
 # --- Configuration Settings ---
 # Set to True for the actual mission flight to silence all terminal output 
@@ -16,54 +26,126 @@ FLIGHT_MODE = True
 # Sensor settings
 DHT_SENSOR = Adafruit_DHT.DHT11
 DHT_PIN = 4 
+LOG_INTERVAL = 10 # Seconds between sensor reads
+
+# Real-time tuning for the timing-sensitive DHT11 bit-banging. SCHED_FIFO and 
+# negative nice values need root or CAP_SYS_NICE; without them the reader 
+# simply runs at normal priority.
+DHT_READER_CPU = 0
+DHT_READER_FIFO_PRIORITY = 10
+DHT_READER_NICE = -5
 
 # Directory for data files (Relative to src/logger/)
 DATA_DIR = "data"
 DATA_FILE = os.path.join(DATA_DIR, "DHT11.txt")
+DATA_BACKUP_FILE = os.path.join(DATA_DIR, "DHT11_backup.txt")
+
+# Seconds between backup snapshots of the log (a full copy is O(file size),
+# so it must never run per sample)
+BACKUP_INTERVAL = 3600
+
+# Pending log lines are flushed to the card at least this often (seconds)
+LOG_FLUSH_INTERVAL = 60
 
-# Central file for real-time monitoring dashboard
-LIVE_DATA_FILE = os.path.join(DATA_DIR, "LATEST_SENSOR_DATA.json")
+# CSV row template; bytes %-formatting runs in C and yields the bytes that go 
+# into the pending log directly, without an f-string build + encode per sample
+LOG_LINE_FORMAT = b"%s,%.1f,%.1f\n"
+
+# Temp file for live dashboard updates
+LIVE_DATA_TMP_FILE = LIVE_DATA_FILE + ".dht.tmp" # Private to this logger
 
 # Store the start time of the script to calculate total runtime
 SCRIPT_START_TIME = datetime.now()
 
-def write_live_data(data):
-    """
-    Reads the existing live data file, updates the DHT metrics, and writes 
-    the complete data structure back. This ensures all logger data is 
-    combined into one file for the web UI.
-    """
-    full_data = {}
-    
-    # 1. Attempt to read existing data (may not exist if other loggers haven't run yet)
-    if os.path.exists(LIVE_DATA_FILE):
-        try:
-            # Use minimal read/write operations for memory safety
-            with open(LIVE_DATA_FILE, 'r') as f:
-                full_data = json.load(f)
-        except Exception:
-            # Ignore read errors (e.g., file being written by another logger), start fresh
-            pass 
+# Minimum seconds between terminal status refreshes (decoupled from sample rate)
+STATUS_INTERVAL = 1.0
+_last_status = 0.0
 
-    # 2. Update the specific DHT fields
-    full_data.update({
-        "timestamp": data["timestamp"],
-        "temp": data["temp"],
-        "hum": data["hum"],
-    })
+# --- DHT SENSOR SETUP ---
+# Prefer the pigpio daemon, which timestamps GPIO edges from a DMA sample 
+# buffer, so Python only decodes 40 pulse widths. Adafruit_DHT bit-bangs the 
+# protocol from user space and stays as the fallback when pigpiod is absent.
+DHT_READ_RETRIES = 15 # Same retry budget as Adafruit_DHT.read_retry
+DHT_RETRY_DELAY = 2 # The DHT11 needs ~1-2 s between conversions
 
-    # 3. Overwrite the file with the complete, updated data structure
-    try:
-        with open(LIVE_DATA_FILE, 'w') as f:
-            json.dump(full_data, f, indent=4)
-    except Exception as e:
-        # Fail silently in flight mode
-        if not FLIGHT_MODE:
-            print(f"Error writing live data JSON: {e}")
+class PigpioDHT11:
+    """Reads a DHT11 through pigpiod edge callbacks instead of bit-banging."""
 
+    def __init__(self, pi, gpio):
+        self.pi = pi
+        self.gpio = gpio
+        self._highs = [] # Widths (us) of the high pulses seen since the last trigger
+        self._rise_tick = None
+        pi.set_pull_up_down(gpio, pigpio.PUD_OFF)
+        self._cb = pi.callback(gpio, pigpio.EITHER_EDGE, self._edge)
+
+    def close(self):
+        """Cancels the edge callback and releases the pigpiod connection."""
+        self._cb.cancel()
+        self.pi.stop()
+
+    def _edge(self, gpio, level, tick):
+        if level == 1:
+            self._rise_tick = tick
+        elif level == 0 and self._rise_tick is not None:
+            self._highs.append(pigpio.tickDiff(self._rise_tick, tick))
+            self._rise_tick = None
+
+    def read(self):
+        """Triggers one conversion and returns (humidity, temperature) or (None, None)."""
+        self._highs = []
+        self._rise_tick = None
+        self.pi.set_mode(self.gpio, pigpio.OUTPUT)
+        self.pi.write(self.gpio, 0)
+        time.sleep(0.018) # Start signal: hold the line low for >= 18 ms
+        self.pi.set_mode(self.gpio, pigpio.INPUT)
+        time.sleep(0.05) # The 40-bit frame itself takes ~5 ms
+
+        # The last 40 high pulses are the data bits: ~27 us means 0, ~70 us means 1
+        highs = self._highs[-40:]
+        if len(highs) < 40:
+            return None, None
+        data = [0] * 5
+        for i, width in enumerate(highs):
+            data[i // 8] = (data[i // 8] << 1) | (width > 50)
+        if (sum(data[:4]) & 0xFF) != data[4]:
+            return None, None
+        return data[0] + data[1] / 10.0, data[2] + data[3] / 10.0
+
+# Set up by main(); None means reads go through Adafruit_DHT
+dht_reader = None
+
+def open_dht_reader():
+    """Connects to pigpiod and returns a PigpioDHT11, or None when pigpio or the daemon is unavailable."""
+    if pigpio is None:
+        return None
+    pi = pigpio.pi()
+    if not pi.connected:
+        return None
+    return PigpioDHT11(pi, DHT_PIN)
+
+def read_sensor():
+    """Returns (humidity, temperature), retrying like Adafruit_DHT.read_retry."""
+    if dht_reader is None:
+        return Adafruit_DHT.read_retry(DHT_SENSOR, DHT_PIN)
+    for _ in range(DHT_READ_RETRIES):
+        humidity, temperature = dht_reader.read()
+        if humidity is not None:
+            return humidity, temperature
+        time.sleep(DHT_RETRY_DELAY)
+    return None, None
+
+def print_status(message):
+    """Rewrites the single-line terminal status, at most once per STATUS_INTERVAL."""
+    global _last_status
+    now = time.monotonic()
+    if now - _last_status >= STATUS_INTERVAL:
+        print(f"\r{message}", end="", flush=True)
+        _last_status = now
 
 def main():
     """Main function to run the sensor logging loop."""
+    global dht_reader
     os.makedirs(DATA_DIR, exist_ok=True)
     
     # Ensure the main data log file has a header
@@ -78,25 +160,127 @@ def main():
                 print(f"CRITICAL ERROR: Failed to create log file: {e}")
             return
     
+    # Keep one append-only descriptor open for the whole flight instead of 
+    # reopening the log for every sample
+    try:
+        log_fd = os.open(DATA_FILE, os.O_WRONLY | os.O_APPEND)
+    except Exception as e:
+        if not FLIGHT_MODE:
+            print(f"CRITICAL ERROR: Failed to open log file: {e}")
+        return
+
+    # The launcher stops payloads with SIGTERM; treat it like Ctrl+C so 
+    # main_loop still flushes the pending lines on the way out
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    dht_reader = open_dht_reader()
+
     if not FLIGHT_MODE:
         print(f"Kabot-1 Data Logger is active. Logging to {DATA_FILE}. Press Ctrl+C to stop.")
-    main_loop()
+    main_loop(log_fd)
+
+def copy_log(src, dst):
+    """
+    Copies src to dst inside the kernel with copy_file_range (no round trip 
+    through a userspace buffer, and a reflink on filesystems that support 
+    it). Falls back to shutil.copyfile on kernels/platforms without it.
+    """
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+    except (AttributeError, OSError):
+        shutil.copyfile(src, dst)
+
+def backup_log(log_fd):
+    """Flushes the log to the SD card and snapshots it to the backup file."""
+    try:
+        flush_log(log_fd)
+        copy_log(DATA_FILE, DATA_BACKUP_FILE)
+    except Exception as e:
+        if not FLIGHT_MODE:
+            print(f"\nError backing up log file: {e}")
+
+def tune_reader_thread():
+    """
+    Pins the calling thread to DHT_READER_CPU and raises its scheduling 
+    priority, so scheduler migrations do not break the DHT11 pulse timing 
+    (fewer failed reads, fewer read_retry spins). On Linux these calls only 
+    affect the calling thread.
+    """
+    try:
+        os.sched_setaffinity(0, {DHT_READER_CPU})
+    except (AttributeError, OSError):
+        pass
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(DHT_READER_FIFO_PRIORITY))
+    except (AttributeError, OSError):
+        try:
+            os.nice(DHT_READER_NICE)
+        except (AttributeError, OSError):
+            pass # No CAP_SYS_NICE; keep the default priority
+
+def sensor_reader(samples):
+    """
+    Background thread: reads the DHT11 every LOG_INTERVAL seconds and hands 
+    the newest reading to the main loop. read_retry can block for ~30 s on a 
+    failing sensor, so it must not run on the thread that handles Ctrl+C.
+    """
+    tune_reader_thread()
+    # Keep reads on a fixed monotonic grid so the read_retry time does not 
+    # stretch the cadence; after an overrun, restart the grid instead of 
+    # firing back-to-back reads the DHT11 cannot serve
+    deadline = time.monotonic()
+    while True:
+        reading = read_sensor()
+        try:
+            samples.put_nowait(reading)
+        except queue.Full:
+            # Main loop has not consumed the previous reading; keep the newest
+            try:
+                samples.get_nowait()
+            except queue.Empty:
+                pass
+            samples.put_nowait(reading)
+        deadline += LOG_INTERVAL
+        delay = deadline - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            deadline = time.monotonic()
 
-def main_loop():
+def main_loop(log_fd):
     """Continuously reads sensor data and logs it."""
+    last_backup = time.monotonic()
+    samples = queue.Queue(maxsize=1)
+    threading.Thread(target=sensor_reader, args=(samples,), daemon=True).start()
     try:
         while True:
-            humidity, temperature = Adafruit_DHT.read_retry(DHT_SENSOR, DHT_PIN)
+            # Checked on every pass, not only after a valid sample, so the 
+            # pending lines still reach the card while the sensor is failing
+            if time.monotonic() - last_backup >= BACKUP_INTERVAL:
+                backup_log(log_fd)
+                last_backup = time.monotonic()
+            elif flush_due(LOG_FLUSH_INTERVAL):
+                flush_log(log_fd)
+
+            try:
+                # Short timeout keeps the main thread responsive to Ctrl+C
+                humidity, temperature = samples.get(timeout=1.0)
+            except queue.Empty:
+                continue
             
             if humidity is not None and temperature is not None:
                 if 20 <= humidity <= 90:
                     # Use only HH:MM:SS for timestamp to save space in log
-                    timestamp = datetime.now().strftime("%H:%M:%S")
+                    timestamp = time.strftime("%H:%M:%S") # No datetime object per sample
                     
                     # Log the data line to the main CSV file (Memory-Safe Append)
-                    data_line = f"{timestamp},{temperature:.1f},{humidity:.1f}\n"
-                    with open(DATA_FILE, "a") as f:
-                        f.write(data_line)
+                    append_log(LOG_LINE_FORMAT % (timestamp.encode(), temperature, humidity))
                     
                     # Log the data point to the centralized JSON file for the dashboard
                     data_point = {
@@ -104,17 +288,15 @@ def main_loop():
                         "temp": round(temperature, 1),
                         "hum": round(humidity, 1)
                     }
-                    write_live_data(data_point)
+                    write_live_data(data_point, LIVE_DATA_TMP_FILE, FLIGHT_MODE)
 
                     if not FLIGHT_MODE:
-                        print(f"\rLogged: {timestamp} | Temp: {temperature:.1f}°C | Hum: {humidity:.1f}%", end="", flush=True)
+                        print_status(f"Logged: {timestamp} | Temp: {temperature:.1f}°C | Hum: {humidity:.1f}%")
                     
                 elif not FLIGHT_MODE:
-                    print(f"\rInvalid humidity reading: {humidity:.1f}%. Data not logged.", end="", flush=True)
+                    print_status(f"Invalid humidity reading: {humidity:.1f}%. Data not logged.")
             elif not FLIGHT_MODE:
-                print("\rFailed to retrieve data from DHT11 sensor.", end="", flush=True)
-            
-            time.sleep(10) # Log every 10 seconds
+                print_status("Failed to retrieve data from DHT11 sensor.")
             
     except KeyboardInterrupt:
         if not FLIGHT_MODE:
@@ -125,6 +307,19 @@ def main_loop():
     except Exception as e:
         if not FLIGHT_MODE:
             print(f"\nAN UNEXPECTED ERROR OCCURRED: {e}")
+    finally:
+        # Make sure every logged line reaches the SD card before exiting
+        try:
+            flush_log(log_fd)
+            os.close(log_fd)
+        except Exception:
+            pass
+        # Release the pigpiod edge callback and connection
+        if dht_reader is not None:
+            try:
+                dht_reader.close()
+            except Exception:
+                pass
 
 
 if __name__ == "__main__":
@@ -7,23 +7,54 @@
 
 import time
 import os
-from datetime import datetime
-import json 
 import random
+import signal
+import queue
+import threading
+from _common import LIVE_DATA_FILE, write_live_data, append_log, flush_due, flush_log
 
 # --- Configuration Settings ---
 FLIGHT_MODE = True 
 DATA_DIR = "data"
 LOG_FILE = os.path.join(DATA_DIR, "MPU6050.txt")
 
-# Central file for real-time monitoring dashboard
-LIVE_DATA_FILE = os.path.join(DATA_DIR, "LATEST_SENSOR_DATA.json")
+# Temp file for live dashboard updates
+LIVE_DATA_TMP_FILE = LIVE_DATA_FILE + ".mpu.tmp" # Private to this logger
 
 LOG_INTERVAL = 1 # Log motion data more frequently than temp/humidity
 
+# Pending log lines are flushed to the card at least this often (seconds)
+LOG_FLUSH_INTERVAL = 30
+
+# CSV row template; bytes %-formatting runs in C and yields the bytes that go 
+# into the pending log directly, without parsing format specs or encoding per sample
+LOG_LINE_FORMAT = b"%s,%.2f,%.2f,%.2f,%.2f,%.2f,%.2f\n"
+
+# Samples handed from the sampling loop to the writer thread as 
+# (CSV row, live data point) pairs; a None item tells the writer to stop
+LOG_QUEUE_SIZE = 1024
+WRITER_BATCH = 64
+# Total seconds shutdown may spend handing the writer its stop marker and 
+# waiting for it to drain; one budget for both waits, kept under the 
+# launcher's SIGTERM grace period (main.SHUTDOWN_TIMEOUT, 5 s)
+WRITER_STOP_TIMEOUT = 4.0
+_samples = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+
 # --- MPU/MOCK SENSOR SETUP ---
 try:
     import numpy as np
+
+    # One sine period sampled once at import, as plain floats: a list lookup 
+    # per sample instead of a NumPy scalar ufunc dispatch
+    _LUT_SIZE = 1024
+    _SIN_LUT = np.sin(np.linspace(0, 2 * np.pi, _LUT_SIZE, endpoint=False)).tolist()
+    _LUT_PER_RAD = _LUT_SIZE / (2 * np.pi)
+
+    def _lut_sin(phase):
+        return _SIN_LUT[int(phase * _LUT_PER_RAD) % _LUT_SIZE]
+
+    def _lut_cos(phase):
+        return _SIN_LUT[(int(phase * _LUT_PER_RAD) + _LUT_SIZE // 4) % _LUT_SIZE]
     
     class MockMPU6050:
         def get_accel_data(self):
@@ -32,12 +63,12 @@ try:
             return {
                 'x': 0.15 + random.uniform(-0.02, 0.02),
                 'y': -0.20 + random.uniform(-0.02, 0.02),
-                'z': 1.0 + 0.1 * np.sin(t*0.5) + random.uniform(-0.02, 0.02)
+                'z': 1.0 + 0.1 * _lut_sin(t*0.5) + random.uniform(-0.02, 0.02)
             }
         def get_gyro_data(self):
             # Mock X-Gyro (Roll Rate) fluctuation
             return {
-                'x': 5.0 * np.cos(time.time() * 0.2) + random.uniform(-0.5, 0.5),
+                'x': 5.0 * _lut_cos(time.time() * 0.2) + random.uniform(-0.5, 0.5),
                 'y': 6.3 + random.uniform(-0.1, 0.1),
                 'z': 0.1 + random.uniform(-0.1, 0.1)
             }
@@ -56,37 +87,6 @@ except ImportError:
     sensor = SimpleMockMPU6050()
 
 
-def write_live_data(data):
-    """
-    Reads the existing live data file, updates the MPU metrics, and writes 
-    the complete data structure back.
-    """
-    full_data = {}
-    
-    # 1. Attempt to read existing data
-    if os.path.exists(LIVE_DATA_FILE):
-        try:
-            with open(LIVE_DATA_FILE, 'r') as f:
-                full_data = json.load(f)
-        except Exception:
-            pass # Ignore read errors
-
-    # 2. Update the specific MPU fields
-    full_data.update({
-        "timestamp": data["timestamp"],
-        "accel_z": data["accel_z"],
-        "gyro_x": data["gyro_x"],
-    })
-
-    # 3. Overwrite the file with the complete, updated data structure
-    try:
-        with open(LIVE_DATA_FILE, 'w') as f:
-            json.dump(full_data, f, indent=4)
-    except Exception as e:
-        if not FLIGHT_MODE:
-            print(f"Error writing live data JSON: {e}")
-
-
 def initialize_log_file():
     """Ensures the data directory exists and the log file is created with a header."""
     os.makedirs(DATA_DIR, exist_ok=True)
@@ -103,22 +103,66 @@ def initialize_log_file():
             return False
     return True
 
+def log_writer(log_fd):
+    """
+    Background thread: drains queued samples in batches, appends their rows 
+    to the log and refreshes the live JSON with the newest point, so SD-card 
+    write and fsync stalls never hold up the sampling loop.
+    """
+    while True:
+        try:
+            batch = [_samples.get(timeout=LOG_FLUSH_INTERVAL)]
+        except queue.Empty:
+            batch = []
+        while len(batch) < WRITER_BATCH:
+            try:
+                batch.append(_samples.get_nowait())
+            except queue.Empty:
+                break
+
+        stop = None in batch
+        latest = None
+        for item in batch:
+            if item is not None:
+                append_log(item[0])
+                latest = item[1]
+
+        try:
+            if latest is not None:
+                write_live_data(latest, LIVE_DATA_TMP_FILE, FLIGHT_MODE)
+            if stop or flush_due(LOG_FLUSH_INTERVAL):
+                flush_log(log_fd)
+        except Exception as e:
+            if not FLIGHT_MODE:
+                print(f"\rError writing MPU-6050 log: {e}        ", end="", flush=True)
+        if stop:
+            return
+
+def queue_sample(item):
+    """Hands a sample to the writer without blocking; drops the oldest one if the writer has fallen behind."""
+    try:
+        _samples.put_nowait(item)
+    except queue.Full:
+        try:
+            _samples.get_nowait()
+        except queue.Empty:
+            pass
+        _samples.put_nowait(item)
+
 def log_data_point():
-    """Reads MPU-6050 data, formats it, and APPENDS it to the log file and updates the JSON stream."""
-    timestamp = datetime.now().strftime("%H:%M:%S")
+    """Reads MPU-6050 data, formats it, and queues it for the log file and the JSON stream."""
+    timestamp = time.strftime("%H:%M:%S") # C-level format, no datetime object per sample
 
     try:
         accel_data = sensor.get_accel_data()
         gyro_data = sensor.get_gyro_data()
         
         # --- 1. CSV Log (Memory-Safe Append) ---
-        data_line = (
-            f"{timestamp},"
-            f"{accel_data['x']:.2f},{accel_data['y']:.2f},{accel_data['z']:.2f},"
-            f"{gyro_data['x']:.2f},{gyro_data['y']:.2f},{gyro_data['z']:.2f}\n"
+        data_line = LOG_LINE_FORMAT % (
+            timestamp.encode(),
+            accel_data['x'], accel_data['y'], accel_data['z'],
+            gyro_data['x'], gyro_data['y'], gyro_data['z'],
         )
-        with open(LOG_FILE, "a") as f:
-            f.write(data_line)
         
         # --- 2. JSON Live Data Update ---
         data_point = {
@@ -127,7 +171,7 @@ def log_data_point():
             "accel_z": round(accel_data['z'], 2), 
             "gyro_x": round(gyro_data['x'], 2),
         }
-        write_live_data(data_point)
+        queue_sample((data_line, data_point))
         
         if not FLIGHT_MODE:
             print(f"\rLogged: {timestamp} | Accel Z:{accel_data['z']:.2f} g | Gyro X:{gyro_data['x']:.2f} d/s", end="", flush=True)
@@ -139,16 +183,41 @@ def log_data_point():
 
 def main_loop():
     """Runs the memory-safe logging loop."""
+    if not initialize_log_file():
+        return
+
+    # Keep one append-only descriptor open for the whole flight instead of 
+    # reopening the log for every sample
+    try:
+        log_fd = os.open(LOG_FILE, os.O_WRONLY | os.O_APPEND)
+    except Exception as e:
+        if not FLIGHT_MODE:
+            print(f"Error opening log file: {e}")
+        return
+
+    # The launcher stops payloads with SIGTERM; treat it like Ctrl+C so the 
+    # pending lines below still get flushed
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    writer = threading.Thread(target=log_writer, args=(log_fd,), daemon=True)
+    writer.start()
+
     try:
-        if not initialize_log_file():
-            return
-            
         if not FLIGHT_MODE:
             print("\nMPU-6050 Logger is active. Press Ctrl+C to stop.")
         
+        # Sleep until the next slot on a fixed monotonic grid rather than a 
+        # flat LOG_INTERVAL, so the per-sample work does not stretch the 
+        # cadence; after an overrun, restart the grid instead of bursting
+        deadline = time.monotonic()
         while True:
             log_data_point()
-            time.sleep(LOG_INTERVAL)
+            deadline += LOG_INTERVAL
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                deadline = time.monotonic()
             
     except KeyboardInterrupt:
         if not FLIGHT_MODE:
@@ -156,6 +225,16 @@ def main_loop():
     except Exception as e:
         if not FLIGHT_MODE:
             print(f"\nAn unexpected error occurred during main loop: {e}")
+    finally:
+        # Let the writer drain the queue so every logged line reaches the SD 
+        # card before exiting
+        deadline = time.monotonic() + WRITER_STOP_TIMEOUT
+        try:
+            _samples.put(None, timeout=WRITER_STOP_TIMEOUT)
+            writer.join(max(0.0, deadline - time.monotonic()))
+            os.close(log_fd)
+        except Exception:
+            pass
 
 if __name__ == "__main__":
     main_loop()
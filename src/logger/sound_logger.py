@@ -1,14 +1,23 @@
-import os, time, shutil
+import os, io, sys, time, queue, threading, calendar, signal
 import matplotlib
 matplotlib.use("Agg")  # headless, lightweight
-import matplotlib.pyplot as plt
-from datetime import datetime
+import matplotlib.style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_svg import FigureCanvasSVG
+import numpy as np
 from gpiozero import LED, Button
 
+# The SVG settings and the chart swap are shared with the post-flight plotters
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from plotter._common import SVG_RCPARAMS, SVG_METADATA, replace_chart
+
 # --- Hardware Pins ---
 SOUND_DETECTOR_PIN = 14
 BUZZER_PIN = 21
 
+# --- Test Cycle ---
+PHASE_SAMPLES = 5 # One-second samples per phase (buzzer on, then ambient)
+
 # --- File Paths ---
 DATA_DIR = "src/logger/data"
 CHARTS_DIR = "src/charts"
@@ -17,90 +26,212 @@ DATA_BACKUP_FILE = os.path.join(DATA_DIR, "sound_backup.txt")
 CHART_FILE = os.path.join(CHARTS_DIR, "sound_chart.svg")
 CHART_BACKUP_FILE = os.path.join(CHARTS_DIR, "sound_chart_backup.svg")
 
+# Bytes compared at each end of the backup to confirm it still mirrors the log
+BACKUP_CHECK_BLOCK = 4096
+
+# --- Live Chart Buffer ---
+# Ring buffer of the most recent samples, plotted by generate_chart
+MAX_CHART_POINTS = 600
+_ts_buf = np.empty(MAX_CHART_POINTS, dtype="datetime64[s]")
+_val_buf = np.empty(MAX_CHART_POINTS, dtype=np.int8)
+_buzz_buf = np.empty(MAX_CHART_POINTS, dtype=np.int8)
+_head = 0
+_count = 0
+
+# Live chart figure, canvas and artists, created on the first generate_chart call
+matplotlib.style.use("seaborn-v0_8-whitegrid")
+_fig = _canvas = _ax = _sound_line = _buzzer_line = None
+
+matplotlib.rcParams.update(SVG_RCPARAMS)  # lean, byte-deterministic SVG output
+
+# Pending chart render for the worker thread; holds at most the newest snapshot
+_chart_q = queue.Queue(maxsize=1)
+
 # --- GPIO Devices ---
 buzzer = LED(BUZZER_PIN)
 sound_sensor = Button(SOUND_DETECTOR_PIN)
 
-def safe_write(path, line):
-    tmp = path + ".tmp"
-    with open(tmp, "a") as f:
-        f.write(line)
-    os.replace(tmp, path)
+def write_rows(f, rows):
+    """Appends the collected rows with one write() and flushes them to the log."""
+    f.write("".join(rows))
+    f.flush()
+    rows.clear()
+
+def backup_in_sync(src_fd, dst_fd, done):
+    """True if the backup still matches the log at both ends of its first done bytes."""
+    for offset in {0, max(done - BACKUP_CHECK_BLOCK, 0)}:
+        n = min(BACKUP_CHECK_BLOCK, done - offset)
+        if os.pread(src_fd, n, offset) != os.pread(dst_fd, n, offset):
+            return False
+    return True
+
+def backup_log():
+    """Appends the log's new bytes to the backup, rebuilding it if it no longer matches."""
+    fd = os.open(DATA_BACKUP_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        with open(DATA_FILE, "rb") as fsrc:
+            size = os.fstat(fsrc.fileno()).st_size
+            done = os.fstat(fd).st_size
+            if done > size or not backup_in_sync(fsrc.fileno(), fd, done):
+                done = 0
+            try:
+                os.ftruncate(fd, done)
+                os.lseek(fd, done, os.SEEK_SET)
+                fsrc.seek(done)
+                remaining = size - done
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fd, remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            except (AttributeError, OSError):
+                os.ftruncate(fd, done)
+                os.lseek(fd, done, os.SEEK_SET)
+                fsrc.seek(done)
+                for chunk in iter(lambda: fsrc.read(1 << 16), b""):
+                    os.write(fd, chunk)
+    finally:
+        os.close(fd)
+
+def record_sample(now, val, buzz):
+    """Stores one sample in the live chart ring buffer, overwriting the oldest."""
+    global _head, _count
+    _ts_buf[_head] = calendar.timegm(now)
+    _val_buf[_head] = val
+    _buzz_buf[_head] = buzz
+    _head = (_head + 1) % MAX_CHART_POINTS
+    _count = min(_count + 1, MAX_CHART_POINTS)
+
+def init_files():
+    """Creates the data/chart directories once at startup, not every cycle."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    os.makedirs(CHARTS_DIR, exist_ok=True)
+
+def open_log():
+    """Opens the log for appending, writing the header if the file is new or was recreated."""
+    log = open(DATA_FILE, "a")
+    if log.tell() == 0:
+        log.write("timestamp,sound_detected,is_buzzer_on\n")
+        log.flush()
+    return log
+
+def sample_cycle(rows):
+    """Runs one buzzer-on and one ambient phase, sampling once a second on a fixed grid."""
+    base = time.time()
+    start = time.monotonic()
+    slots = []
+    for i in range(2 * PHASE_SAMPLES):
+        lt = time.localtime(base + i)
+        slots.append((lt, time.strftime("%Y-%m-%d %H:%M:%S", lt)))
+
+    buzzer.on()
+    print("Buzzer ON...", end="", flush=True)
+    for i, (now, ts) in enumerate(slots):
+        if i == PHASE_SAMPLES:
+            buzzer.off()
+            print("OFF...Ambient...", end="", flush=True)
+        buzz = int(i < PHASE_SAMPLES)
+        delay = start + i - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        val = int(sound_sensor.is_pressed)
+        rows.append(f"{ts},{val},{buzz}\n")
+        record_sample(now, val, buzz)
+    # Hold the last sample's full second
+    delay = start + len(slots) - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
 
 def log_sound_data():
     try:
-        os.makedirs(DATA_DIR, exist_ok=True)
-        if not os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "w") as f:
-                f.write("timestamp,sound_detected,is_buzzer_on\n")
-
-        shutil.copyfile(DATA_FILE, DATA_BACKUP_FILE)
-
-        # Test 1: Buzzer ON
-        buzzer.on()
-        print("Buzzer ON...", end="", flush=True)
-        for _ in range(5):
-            ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            val = int(sound_sensor.is_pressed)
-            safe_write(DATA_FILE, f"{ts},{val},1\n")
-            time.sleep(1)
-        buzzer.off()
-        print("OFF...", end="", flush=True)
-
-        # Test 2: Ambient
-        print("Ambient...", end="", flush=True)
-        for _ in range(5):
-            ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            val = int(sound_sensor.is_pressed)
-            safe_write(DATA_FILE, f"{ts},{val},0\n")
-            time.sleep(1)
+        # Open the log before the backup so a deleted one is recreated first
+        rows = []
+        with open_log() as log:
+            backup_log()
+            try:
+                sample_cycle(rows)
+            finally:
+                buzzer.off()
+                write_rows(log, rows) # Keep whatever was sampled, even on Ctrl+C
         print("done.", flush=True)
         return True
     except Exception as e:
         print(f"[Error in log_sound_data: {e}]", flush=True)
         return False
 
-def generate_chart():
+def init_chart(dates, vals, buzzer_on_dates):
+    """Builds the live chart figure and its artists once; later cycles only update them."""
+    global _fig, _canvas, _ax, _sound_line, _buzzer_line
+    _fig = Figure(figsize=(8, 4))
+    _canvas = FigureCanvasSVG(_fig)
+    _ax = _fig.add_subplot(111)
+    (_sound_line,) = _ax.step(dates, vals, where="mid", label="Sound Detected")
+    (_buzzer_line,) = _ax.plot(buzzer_on_dates, np.full(len(buzzer_on_dates), 1.05), "ro", label="Buzzer ON")
+    _ax.set_yticks([0, 1])
+    _ax.set_title("Sound Detection (D0)")
+    _ax.set_xlabel("Time")
+    _ax.set_ylabel("Detected")
+    _fig.autofmt_xdate()
+    _ax.legend()
+
+def chart_snapshot():
+    """Copies the ring buffer out in chronological order, safe to hand to the chart worker."""
+    idx = (np.arange(_count) + _head - _count) % MAX_CHART_POINTS
+    return _ts_buf[idx], _val_buf[idx], _buzz_buf[idx]
+
+def generate_chart(dates, vals, buzz):
     try:
-        os.makedirs(CHARTS_DIR, exist_ok=True)
-        dates, vals, buzz = [], [], []
-        with open(DATA_FILE, "r") as f:
-            next(f)
-            for line in f:
-                try:
-                    ts, s, b = line.strip().split(',')
-                    dates.append(datetime.strptime(ts, "%Y-%m-%d %H:%M:%S"))
-                    vals.append(int(s))
-                    buzz.append(int(b))
-                except Exception:
-                    continue
-        if not dates:
-            return
-        if os.path.exists(CHART_FILE):
-            os.replace(CHART_FILE, CHART_BACKUP_FILE)
-
-        plt.style.use("seaborn-v0_8-whitegrid")
-        fig, ax = plt.subplots(figsize=(8, 4))
-        ax.step(dates, vals, where="mid", label="Sound Detected")
-        buzzer_on_dates = [dates[i] for i, state in enumerate(buzz) if state == 1]
-        ax.plot(buzzer_on_dates, [1.05]*len(buzzer_on_dates), "ro", label="Buzzer ON")
-        ax.set_yticks([0, 1])
-        ax.set_title("Sound Detection (D0)")
-        ax.set_xlabel("Time")
-        ax.set_ylabel("Detected")
-        fig.autofmt_xdate()
-        ax.legend()
-        plt.savefig(CHART_FILE)
-        plt.close(fig)
+        buzzer_on_dates = dates[buzz == 1] # Boolean mask, filtered in C
+        if _fig is None:
+            init_chart(dates, vals, buzzer_on_dates)
+        else:
+            # Reuse the figure: only the line data changes between cycles
+            _sound_line.set_data(dates, vals)
+            _buzzer_line.set_data(buzzer_on_dates, np.full(len(buzzer_on_dates), 1.05))
+            _ax.relim()
+            _ax.autoscale_view()
+        # Build the SVG in memory and write it in one go
+        tmp_file = CHART_FILE + ".tmp"
+        svg = io.BytesIO()
+        _canvas.print_svg(svg, metadata=SVG_METADATA)
+        with open(tmp_file, "wb") as f:
+            f.write(svg.getbuffer())
+        replace_chart(tmp_file, CHART_FILE, CHART_BACKUP_FILE)
     except Exception as e:
         print(f"[Error in generate_chart: {e}]", flush=True)
 
-if __name__ == "__main__":
+def chart_worker():
+    """Background thread: renders the newest queued snapshot, so sampling never waits on matplotlib."""
+    while True:
+        generate_chart(*_chart_q.get())
+
+def request_chart(frame):
+    """Queues a chart render, replacing any snapshot the worker has not picked up yet."""
+    try:
+        _chart_q.get_nowait()
+    except queue.Empty:
+        pass
+    _chart_q.put_nowait(frame)
+
+def main_loop():
+    """Runs sound test cycles until interrupted, regenerating the chart after each."""
+    # The launcher stops payloads with SIGTERM; handle it like Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    try:
+        init_files()
+    except Exception as e:
+        print(f"[Error creating sound log files: {e}]", flush=True)
+        return
+    threading.Thread(target=chart_worker, daemon=True).start()
     try:
         while True:
-            if log_sound_data():
-                generate_chart()
+            if log_sound_data() and _count:
+                request_chart(chart_snapshot())
             time.sleep(6)  # 0.1 minutes
     except KeyboardInterrupt:
         buzzer.off()
         print("\nLogger stopped cleanly.", flush=True)
+
+if __name__ == "__main__":
+    main_loop()
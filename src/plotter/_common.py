@@ -0,0 +1,105 @@
+# =========================================================================
+# Kabot-1 Plotter Helpers
+# =========================================================================
+# Shared by the plotter scripts, which import it as a sibling module
+# (their own directory is on sys.path when run as scripts), and by the
+# sound logger's live chart, which imports it as plotter._common.
+# =========================================================================
+
+import os
+import shutil
+import numpy as np
+
+# Lean, deterministic SVG output: drop vertices that move the path by less
+# than a pixel, keep text as <text> rather than glyph outlines, and fix the
+# element-id salt and metadata so identical data gives a byte-identical file.
+# The chunk size lets Agg draw long rasterized traces in pieces.
+SVG_RCPARAMS = {
+    "path.simplify": True,
+    "path.simplify_threshold": 1.0,
+    "svg.fonttype": "none",
+    "svg.hashsalt": "kabot-1",
+    "agg.path.chunksize": 10000,
+}
+SVG_METADATA = {"Date": None, "Creator": None}
+
+# Raw traces longer than twice this are reduced to a min/max envelope of this
+# many buckets before plotting
+DOWNSAMPLE_BUCKETS = 2000
+
+# Layout of the loggers' 'YYYY-MM-DD HH:MM:SS' timestamps: where the
+# separators sit, every other position being a digit
+TIMESTAMP_LEN = 19
+TIMESTAMP_SEPARATORS = {4: b"-", 7: b"-", 10: b" ", 13: b":", 16: b":"}
+
+def parse_timestamps(stamps):
+    """
+    Converts the raw timestamp column (bytes objects, as genfromtxt returns
+    them for dtype=object) to datetime64[s]. Stamps that are torn, too long,
+    or not a real date and time come back as NaT, so the caller can drop
+    those rows the way the old per-line strptime loop skipped them.
+    """
+    stamps = np.asarray(stamps).astype("S")  # sized to the longest stamp, never truncated
+    dates = np.full(len(stamps), np.datetime64("NaT"), dtype="datetime64[s]")
+    ok = np.char.str_len(stamps) == TIMESTAMP_LEN
+    chars = stamps[ok].astype(f"S{TIMESTAMP_LEN}").view("S1").reshape(-1, TIMESTAMP_LEN)
+    digits = np.ones(TIMESTAMP_LEN, dtype=bool)
+    digits[list(TIMESTAMP_SEPARATORS)] = False
+    well_formed = np.char.isdigit(chars[:, digits]).all(axis=1)
+    for pos, sep in TIMESTAMP_SEPARATORS.items():
+        well_formed &= chars[:, pos] == sep
+    ok[ok] = well_formed
+    try:
+        dates[ok] = stamps[ok].astype("datetime64[s]")
+    except ValueError:
+        # A field out of range (month 13, hour 25...): settle it row by row
+        for i in np.flatnonzero(ok):
+            try:
+                dates[i] = np.datetime64(stamps[i].decode(), "s")
+            except ValueError:
+                pass
+    return dates
+
+def replace_chart(tmp_file, chart_file, backup_file):
+    """
+    Keeps the current chart as the backup via a hardlink (no copy, and the
+    chart never disappears), then atomically swaps the new render in so the
+    web UI never sees a missing or half-written file.
+    """
+    try:
+        os.unlink(backup_file)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(chart_file, backup_file)
+    except FileNotFoundError:
+        pass # First chart of the run: nothing to back up
+    except OSError:
+        shutil.copyfile(chart_file, backup_file)
+    os.replace(tmp_file, chart_file)
+
+def format_duration(seconds):
+    """Formats a whole number of seconds as 'HHh MMm SSs'."""
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours:02d}h {minutes:02d}m {secs:02d}s"
+
+def downsample_minmax(x, y, n_buckets=DOWNSAMPLE_BUCKETS):
+    """
+    Keeps only the min and max sample of each of n_buckets equal slices
+    (plus the leftover tail), in time order. At chart width this draws the
+    same envelope as the full trace from a fraction of the vertices.
+    """
+    n = len(y)
+    if n <= 2 * n_buckets:
+        return x, y
+    size = n // n_buckets
+    whole = size * n_buckets
+    blocks = y[:whole].reshape(n_buckets, size)
+    starts = np.arange(n_buckets) * size
+    idx = np.unique(np.concatenate((
+        starts + np.argmin(blocks, axis=1),
+        starts + np.argmax(blocks, axis=1),
+        np.arange(whole, n),
+    )))
+    return x[idx], y[idx]
@@ -1,8 +1,19 @@
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use("Agg")  # headless; skips GUI backend autodetection
 import matplotlib.dates as mdates
-from datetime import datetime
+import matplotlib.style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import numpy as np
-import os, sys
+import os, sys, warnings
+from _common import (SVG_RCPARAMS, SVG_METADATA, parse_timestamps,
+                     replace_chart, format_duration, downsample_minmax)
+
+# Chart style is global state, so set it once at import rather than per chart
+matplotlib.style.use('ggplot')
+matplotlib.rcParams.update({'font.size': 12, 'axes.labelsize': 14, 'axes.titlesize': 16})
+
+matplotlib.rcParams.update(SVG_RCPARAMS)  # lean, byte-deterministic SVG output
 
 # Try to import smoothing filter
 try:
@@ -18,42 +29,41 @@ CHART_FILE = os.path.join(CHARTS_DIR, "dht_chart.svg")
 CHART_BACKUP_FILE = os.path.join(CHARTS_DIR, "dht_chart_backup.svg")
 
 def generate_chart():
-    dates, temps, hums = [], [], []
-
     if not os.path.exists(DATA_FILE):
         print(f"Error: Mission data file not found at {DATA_FILE}", file=sys.stderr)
         sys.exit(2)
 
     try:
-        with open(DATA_FILE, "r") as f:
-            lines = f.readlines()
-            if lines and "timestamp" in lines[0]:
-                lines = lines[1:]
-            for line in lines:
-                try:
-                    timestamp_str, temp_str, hum_str = line.strip().split(',')
-                    dates.append(datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S"))
-                    temps.append(float(temp_str))
-                    hums.append(float(hum_str))
-                except (ValueError, IndexError):
-                    continue
+        # Parse the whole log in C rather than line by line in Python;
+        # corrupt rows are dropped instead of aborting the parse
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # skipped rows are expected, not news
+            arr = np.atleast_1d(np.genfromtxt(
+                DATA_FILE, delimiter=',', skip_header=1, dtype=[object, 'f4', 'f4'],
+                names=['ts', 't', 'h'], invalid_raise=False, encoding=None
+            ))
+        dates = parse_timestamps(arr['ts'])
+        valid = ~np.isnat(dates) & np.isfinite(arr['t']) & np.isfinite(arr['h'])
+        dates = dates[valid]
+        temps = arr['t'][valid]
+        hums = arr['h'][valid]
     except Exception as e:
         print(f"Error reading data file: {e}", file=sys.stderr)
         sys.exit(2)
 
-    if not dates:
+    if not len(dates):
         print("No data to plot.", file=sys.stderr)
         sys.exit(2)
 
     os.makedirs(CHARTS_DIR, exist_ok=True)
 
-    plt.style.use('ggplot')
-    plt.rcParams.update({'font.size': 12, 'axes.labelsize': 14, 'axes.titlesize': 16})
-    fig, ax1 = plt.subplots(figsize=(12, 7))
+    fig = Figure(figsize=(12, 7))
+    canvas = FigureCanvasAgg(fig)
+    ax1 = fig.add_subplot(111)
 
-    start_time, end_time = dates[0], dates[-1]
+    start_time, end_time = dates[0].astype(object), dates[-1].astype(object)
     duration = end_time - start_time
-    duration_str = f"{int(duration.total_seconds()//3600):02d}h {(int(duration.total_seconds())%3600)//60:02d}m {int(duration.total_seconds()%60):02d}s"
+    duration_str = format_duration(duration.total_seconds())
 
     ax1.set_title(
         f"Kabot I Mission Readings | Duration: {duration_str}\n"
@@ -62,10 +72,10 @@ def generate_chart():
 
     ax1.set_xlabel('Time')
     ax1.set_ylabel('Temperature (°C)', color='tab:red')
-    ax1.plot(dates, temps, color='tab:red', linewidth=1.2, alpha=0.8, label='Temperature (Raw)')
+    ax1.plot(*downsample_minmax(dates, temps), color='tab:red', linewidth=1.2, alpha=0.8, label='Temperature (Raw)', rasterized=True)
     if HAS_SAVGOL and len(temps) >= 11:
         temp_smooth = savgol_filter(temps, 11, 3)
-        ax1.plot(dates, temp_smooth, color='darkred', linestyle='--', linewidth=2, label='Smoothed Temp')
+        ax1.plot(dates, temp_smooth, color='darkred', linestyle='--', linewidth=2, label='Smoothed Temp', rasterized=True)
     ax1.tick_params(axis='y', labelcolor='tab:red')
 
     ax1.xaxis.set_major_locator(mdates.MinuteLocator(interval=15))
@@ -75,10 +85,10 @@ def generate_chart():
 
     ax2 = ax1.twinx()
     ax2.set_ylabel('Humidity (%)', color='tab:blue')
-    ax2.plot(dates, hums, color='tab:blue', linewidth=1.2, alpha=0.8, label='Humidity (Raw)')
+    ax2.plot(*downsample_minmax(dates, hums), color='tab:blue', linewidth=1.2, alpha=0.8, label='Humidity (Raw)', rasterized=True)
     if HAS_SAVGOL and len(hums) >= 11:
         hum_smooth = savgol_filter(hums, 11, 3)
-        ax2.plot(dates, hum_smooth, color='darkblue', linestyle='--', linewidth=2, label='Smoothed Hum')
+        ax2.plot(dates, hum_smooth, color='darkblue', linestyle='--', linewidth=2, label='Smoothed Hum', rasterized=True)
     ax2.tick_params(axis='y', labelcolor='tab:blue')
     ax2.set_ylim(0, 100)
 
@@ -87,11 +97,9 @@ def generate_chart():
     lines2, labels2 = ax2.get_legend_handles_labels()
     ax2.legend(lines + lines2, labels + labels2, loc='upper left')
 
-    if os.path.exists(CHART_FILE):
-        os.replace(CHART_FILE, CHART_BACKUP_FILE)
-
-    plt.savefig(CHART_FILE)
-    plt.close(fig)
+    tmp_file = CHART_FILE + ".tmp"
+    canvas.print_figure(tmp_file, format="svg", metadata=SVG_METADATA)
+    replace_chart(tmp_file, CHART_FILE, CHART_BACKUP_FILE)
     print(f"Chart generated: {CHART_FILE} with {len(dates)} points over {duration_str}")
 
 if __name__ == "__main__":
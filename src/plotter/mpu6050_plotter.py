@@ -7,12 +7,20 @@
 # - Aligns output filename with WebUI: src/charts/mpu_chart.svg
 # =========================================================================
 
+import gzip
+import io
 import os
 import sys
-from datetime import datetime
-import matplotlib.pyplot as plt
+import warnings
+import matplotlib
+matplotlib.use("Agg")  # headless; skips GUI backend autodetection
 import matplotlib.dates as mdates
+import matplotlib.style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import numpy as np
+from _common import (SVG_RCPARAMS, SVG_METADATA, DOWNSAMPLE_BUCKETS, parse_timestamps,
+                     replace_chart, format_duration, downsample_minmax)
 
 # Try to import SciPy smoothing; if unavailable, continue without it
 try:
@@ -21,12 +29,19 @@ try:
 except Exception:
     HAS_SAVGOL = False
 
+# Chart style is global state, so set it once at import rather than per chart
+matplotlib.style.use("ggplot")
+matplotlib.rcParams.update({"font.size": 10, "axes.labelsize": 12, "axes.titlesize": 14})
+
+matplotlib.rcParams.update(SVG_RCPARAMS)  # lean, byte-deterministic SVG output
+
 # Paths (relative to project root)
 DATA_DIR = "src/logger/data"
 DATA_FILE = os.path.join(DATA_DIR, "MPU6050.txt")
 CHARTS_DIR = "src/charts"
 CHART_FILE = os.path.join(CHARTS_DIR, "mpu_chart.svg")  # aligns with WebUI
 CHART_BACKUP_FILE = os.path.join(CHARTS_DIR, "mpu_chart_backup.svg")
+CHART_GZ_FILE = CHART_FILE + ".gz"  # Pre-compressed copy served by the WebUI
 
 # Smoothing settings (used only if HAS_SAVGOL and enough points)
 WINDOW_LENGTH = 51  # must be odd and <= len(series)
@@ -40,69 +55,75 @@ HEADER_MAP = {
     "gx": "gyro_x",  "gy": "gyro_y",  "gz": "gyro_z",
 }
 
+# Column order of the stacked (N, 6) motion matrix
+MOTION_KEYS = ("accel_x", "accel_y", "accel_z", "gyro_x", "gyro_y", "gyro_z")
+
+def decimate_smoothed(x, y, n_points=2 * DOWNSAMPLE_BUCKETS):
+    """
+    Thins an already-smoothed trace to about n_points with a plain stride, 
+    keeping the last sample. Savitzky-Golay output carries no detail finer 
+    than a fraction of its window, so the stride is capped at a quarter 
+    window and the curve looks the same.
+    """
+    stride = min(-(-len(y) // n_points), WINDOW_LENGTH // 4)
+    if stride <= 1:
+        return x, y
+    idx = np.arange(0, len(y), stride)
+    if idx[-1] != len(y) - 1:
+        idx = np.append(idx, len(y) - 1)
+    return x[idx], y[idx]
+
 def generate_mpu_chart():
     # Basic checks
     if not os.path.exists(DATA_FILE):
         print(f"Error: Mission data file not found at {DATA_FILE}", file=sys.stderr)
         sys.exit(2)
 
-    # Read file
+    # Read header
     try:
         with open(DATA_FILE, "r") as f:
-            lines = f.readlines()
+            header_line = f.readline()
     except Exception as e:
         print(f"Error reading data file: {e}", file=sys.stderr)
         sys.exit(2)
 
-    if not lines:
+    if not header_line:
         print("Error: Log file is empty.", file=sys.stderr)
         sys.exit(2)
 
     # Parse header
-    header = [h.strip() for h in lines[0].strip().split(",")]
+    header = [h.strip() for h in header_line.strip().split(",")]
     if len(header) < 7 or header[0].lower() != "timestamp":
         print("Error: Unexpected header format. First column must be 'timestamp'.", file=sys.stderr)
         print(f"Header read: {header}", file=sys.stderr)
         sys.exit(2)
 
-    # Build key list using normalized names
-    raw_keys = header[1:]
-    internal_keys = []
-    for k in raw_keys:
-        ik = HEADER_MAP.get(k.strip())
-        if ik:
-            internal_keys.append((k.strip(), ik))
-        else:
-            # Unknown column; skip it gracefully
-            internal_keys.append((k.strip(), None))
-
-    # Prepare containers
-    dates = []
-    data = {
-        "accel_x": [], "accel_y": [], "accel_z": [],
-        "gyro_x":  [], "gyro_y":  [], "gyro_z":  []
-    }
-
-    # Parse rows
-    for line in lines[1:]:
-        parts = [p.strip() for p in line.strip().split(",")]
-        if len(parts) < 7:
-            continue
-        try:
-            dates.append(datetime.strptime(parts[0], "%Y-%m-%d %H:%M:%S"))
-        except Exception:
-            continue
-
-        for i, (raw_k, internal_k) in enumerate(internal_keys):
-            if internal_k is None:
-                continue
-            try:
-                val = float(parts[i+1])
-            except Exception:
-                val = np.nan
-            data[internal_k].append(val)
-
-    if not dates or all(len(v) == 0 for v in data.values()):
+    # Parse the rows in C rather than line by line in Python: rows with the 
+    # wrong field count are dropped, unparsable values become NaN, and rows 
+    # whose timestamp is malformed are dropped. Columns are addressed by 
+    # position, so unknown header names are simply ignored.
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # skipped rows are expected, not news
+            arr = np.atleast_1d(np.genfromtxt(
+                DATA_FILE, delimiter=",", skip_header=1, autostrip=True,
+                dtype=[object] + ["f4"] * (len(header) - 1),
+                invalid_raise=False, encoding=None
+            ))
+        dates = parse_timestamps(arr["f0"])
+        valid = ~np.isnat(dates)
+        arr, dates = arr[valid], dates[valid]
+    except Exception as e:
+        print(f"Error reading data file: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    data = {}
+    for i, name in enumerate(header[1:], start=1):
+        internal_k = HEADER_MAP.get(name)
+        if internal_k:
+            data[internal_k] = arr[f"f{i}"]
+
+    if not len(dates) or not data:
         print("Error: No data to plot.", file=sys.stderr)
         sys.exit(2)
 
@@ -110,19 +131,14 @@ def generate_mpu_chart():
     os.makedirs(CHARTS_DIR, exist_ok=True)
 
     # Duration
-    start_time = dates[0]
-    end_time = dates[-1]
+    start_time = dates[0].astype(object)
+    end_time = dates[-1].astype(object)
     duration = end_time - start_time
-    total_hours = int(duration.total_seconds() // 3600)
-    total_minutes = int((duration.total_seconds() % 3600) // 60)
-    total_seconds = int(duration.total_seconds() % 60)
-    duration_str = f"{total_hours:02d}h {total_minutes:02d}m {total_seconds:02d}s"
-
-    # Plot style
-    plt.style.use("ggplot")
-    plt.rcParams.update({"font.size": 10, "axes.labelsize": 12, "axes.titlesize": 14})
+    duration_str = format_duration(duration.total_seconds())
 
-    fig, (ax_accel, ax_gyro) = plt.subplots(2, 1, figsize=(14, 10), sharex=True)
+    fig = Figure(figsize=(14, 10))
+    canvas = FigureCanvasAgg(fig)
+    ax_accel, ax_gyro = fig.subplots(2, 1, sharex=True)
     fig.suptitle(
         f"Kabot I Mission MPU-6050 Motion Analysis | Duration: {duration_str}\n"
         f"Start: {start_time.strftime('%Y-%m-%d %H:%M:%S')} | End: {end_time.strftime('%Y-%m-%d %H:%M:%S')}",
@@ -132,27 +148,25 @@ def generate_mpu_chart():
     date_formatter = mdates.DateFormatter("%H:%M")
     colors = {"x": "tab:red", "y": "tab:green", "z": "tab:blue"}
 
-    # Helper for smoothing
-    def maybe_smooth(series):
-        if not HAS_SAVGOL:
-            return None
-        n = len(series)
-        if n < WINDOW_LENGTH or WINDOW_LENGTH % 2 == 0:
-            return None
+    # Stack all six axes into one contiguous (N, 6) matrix so the smoothing 
+    # is a single savgol_filter call down the columns instead of six
+    missing = np.full(len(dates), np.nan, dtype=np.float32)
+    motion = np.column_stack([data.get(k, missing) for k in MOTION_KEYS])
+
+    smoothed = None
+    if HAS_SAVGOL and len(motion) >= WINDOW_LENGTH and WINDOW_LENGTH % 2 == 1:
         try:
-            return savgol_filter(series, WINDOW_LENGTH, POLY_ORDER)
+            smoothed = savgol_filter(motion, WINDOW_LENGTH, POLY_ORDER, axis=0)
         except Exception:
-            return None
+            smoothed = None
 
     # Accel
     ax_accel.set_title("Acceleration Data (Linear G-Forces)", fontsize=14)
     ax_accel.set_ylabel("Acceleration (g)")
-    for axis in ["x", "y", "z"]:
-        raw = np.array(data[f"accel_{axis}"], dtype=float)
-        ax_accel.plot(dates, raw, label=f"Accel {axis} (Raw)", color=colors[axis], linewidth=1.0, alpha=0.3)
-        smooth = maybe_smooth(raw)
-        if smooth is not None:
-            ax_accel.plot(dates, smooth, label=f"Accel {axis} (Smoothed)", color=colors[axis], linewidth=2.0)
+    for col, axis in enumerate(["x", "y", "z"]):
+        ax_accel.plot(*downsample_minmax(dates, motion[:, col]), label=f"Accel {axis} (Raw)", color=colors[axis], linewidth=1.0, alpha=0.3)
+        if smoothed is not None:
+            ax_accel.plot(*decimate_smoothed(dates, smoothed[:, col]), label=f"Accel {axis} (Smoothed)", color=colors[axis], linewidth=2.0)
 
     ax_accel.grid(True, linestyle="--", alpha=0.6)
     ax_accel.legend(loc="upper right", ncol=3)
@@ -161,26 +175,33 @@ def generate_mpu_chart():
     ax_gyro.set_title("Gyroscope Data (Rotational Velocity)", fontsize=14)
     ax_gyro.set_xlabel("Time (HH:MM)")
     ax_gyro.set_ylabel("Angular Velocity (deg/s)")
-    for axis in ["x", "y", "z"]:
-        raw = np.array(data[f"gyro_{axis}"], dtype=float)
-        ax_gyro.plot(dates, raw, label=f"Gyro {axis} (Raw)", color=colors[axis], linewidth=1.0, alpha=0.3)
-        smooth = maybe_smooth(raw)
-        if smooth is not None:
-            ax_gyro.plot(dates, smooth, label=f"Gyro {axis} (Smoothed)", color=colors[axis], linewidth=2.0)
+    for col, axis in enumerate(["x", "y", "z"], start=3):
+        ax_gyro.plot(*downsample_minmax(dates, motion[:, col]), label=f"Gyro {axis} (Raw)", color=colors[axis], linewidth=1.0, alpha=0.3)
+        if smoothed is not None:
+            ax_gyro.plot(*decimate_smoothed(dates, smoothed[:, col]), label=f"Gyro {axis} (Smoothed)", color=colors[axis], linewidth=2.0)
 
     ax_gyro.xaxis.set_major_formatter(date_formatter)
     ax_gyro.grid(True, linestyle="--", alpha=0.6)
     ax_gyro.legend(loc="upper right", ncol=3)
 
     fig.autofmt_xdate(rotation=45)
-    plt.tight_layout(rect=[0, 0, 1, 0.96])
+    fig.tight_layout(rect=[0, 0, 1, 0.96])
 
     # Backup + save
     try:
-        if os.path.exists(CHART_FILE):
-            os.replace(CHART_FILE, CHART_BACKUP_FILE)
-        plt.savefig(CHART_FILE)
-        plt.close(fig)
+        # Write the SVG and its gzip copy (SVG text compresses several-fold) 
+        # before swapping either in; the gzip copy is written last so it is never 
+        # older than the chart it belongs to
+        tmp_file = CHART_FILE + ".tmp"
+        gz_tmp_file = CHART_GZ_FILE + ".tmp"
+        svg = io.BytesIO()
+        canvas.print_figure(svg, format="svg", metadata=SVG_METADATA)
+        with open(tmp_file, "wb") as f:
+            f.write(svg.getbuffer())
+        with open(gz_tmp_file, "wb") as f:
+            f.write(gzip.compress(svg.getvalue(), compresslevel=9, mtime=0))
+        replace_chart(tmp_file, CHART_FILE, CHART_BACKUP_FILE)
+        os.replace(gz_tmp_file, CHART_GZ_FILE)
         print(f"\nSuccessfully generated MPU-6050 mission chart: '{CHART_FILE}'")
         print(f"Chart covers {len(dates)} points over {duration_str}.")
     except Exception as e:
@@ -1,33 +1,47 @@
-import os, sys
-import matplotlib.pyplot as plt
+import os, sys, warnings
+import matplotlib
+matplotlib.use("Agg")  # headless; skips GUI backend autodetection
+import matplotlib.style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import numpy as np
+from _common import SVG_RCPARAMS, SVG_METADATA
 
 DATA_FILE = "src/logger/data/sound.txt"
 CHARTS_DIR = "src/charts"
 CHART_FILE = os.path.join(CHARTS_DIR, "sound_chart.svg")
 
+# Chart style is global state, so set it once at import rather than per chart
+matplotlib.style.use("ggplot")
+
+matplotlib.rcParams.update(SVG_RCPARAMS)  # lean, byte-deterministic SVG output
+
 def generate_sound_chart():
     if not os.path.exists(DATA_FILE):
         print(f"Error: Sound log not found at {DATA_FILE}", file=sys.stderr)
         sys.exit(2)
 
-    with open(DATA_FILE) as f:
-        lines = [l.strip() for l in f if l.strip()]
-    if not lines:
+    # Parse the level column in one vectorized pass; the header and any
+    # malformed rows come back as NaN or are skipped, and are dropped here
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        values = np.atleast_1d(np.genfromtxt(
+            DATA_FILE, delimiter=",", usecols=1, dtype=np.float32, invalid_raise=False
+        ))
+    values = values[np.isfinite(values)]
+    if not len(values):
         print("No sound data to plot.", file=sys.stderr)
         sys.exit(2)
 
-    values = [float(x.split(",")[1]) for x in lines if "," in x]
-
     os.makedirs(CHARTS_DIR, exist_ok=True)
-    plt.style.use("ggplot")
-    plt.figure(figsize=(12,6))
-    plt.plot(values, color="purple", linewidth=1)
-    plt.title("Sound Logger Data")
-    plt.xlabel("Sample")
-    plt.ylabel("Level")
-    plt.savefig(CHART_FILE)
-    plt.close()
+    fig = Figure(figsize=(12,6))
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    ax.plot(values, color="purple", linewidth=1)
+    ax.set_title("Sound Logger Data")
+    ax.set_xlabel("Sample")
+    ax.set_ylabel("Level")
+    canvas.print_figure(CHART_FILE, metadata=SVG_METADATA)
     print(f"Chart generated: {CHART_FILE}")
 
 if __name__ == "__main__":
@@ -1,10 +1,21 @@
-from flask import Flask, render_template, jsonify, send_from_directory
+from flask import Flask, render_template, jsonify, send_from_directory, request
+from werkzeug.security import safe_join
+import mimetypes
+import os
 import subprocess
 import pathlib
 
 BASE = pathlib.Path(__file__).resolve().parent.parent
 CHARTS = BASE / "src" / "charts"
 BLACKBOX = BASE / "blackbox.sh"
+LOGS = BASE / "src" / "logger" / "data"
+
+# Post-flight charts and the log each is rendered from. The sound chart is 
+# left out: the live sound logger writes the same file name.
+CHART_SOURCES = {
+    "dht": ("DHT11.txt", "dht_chart.svg"),
+    "mpu": ("MPU6050.txt", "mpu_chart.svg"),
+}
 
 app = Flask(__name__, template_folder="templates")
 
@@ -14,7 +25,42 @@ def index():
 
 @app.route("/chart/<filename>")
 def chart(filename):
-    return send_from_directory(CHARTS, filename)
+    # Prefer the plotter's pre-compressed copy when the browser takes gzip 
+    # and the copy is at least as new as the chart itself. Whenever a copy 
+    # exists the response depends on Accept-Encoding, so caches are told so 
+    # on both branches.
+    path = safe_join(str(CHARTS), filename)
+    try:
+        gz_mtime = os.stat(path + ".gz").st_mtime if path else None
+    except OSError:
+        gz_mtime = None
+    if gz_mtime is not None and request.accept_encodings["gzip"]:
+        try:
+            fresh = gz_mtime >= os.stat(path).st_mtime
+        except OSError:
+            fresh = False
+        if fresh:
+            response = send_from_directory(
+                CHARTS, filename + ".gz", mimetype=mimetypes.guess_type(filename)[0]
+            )
+            response.headers["Content-Encoding"] = "gzip"
+            response.vary.add("Accept-Encoding")
+            return response
+    response = send_from_directory(CHARTS, filename)
+    if gz_mtime is not None:
+        response.vary.add("Accept-Encoding")
+    return response
+
+def chart_is_current(choice):
+    """True when the chart was rendered after the last write to its log."""
+    source = CHART_SOURCES.get(choice)
+    if source is None:
+        return False
+    log_name, chart_name = source
+    try:
+        return os.stat(CHARTS / chart_name).st_mtime >= os.stat(LOGS / log_name).st_mtime
+    except OSError:
+        return False
 
 @app.route("/blackbox/<choice>")
 def run_blackbox(choice):
@@ -23,6 +69,11 @@ def run_blackbox(choice):
     if not opt:
         return jsonify({"status": "error", "message": "Invalid choice"}), 400
 
+    # Re-running the plotter costs a Python + matplotlib start and a full 
+    # parse of the log; skip it when the log has not changed since
+    if chart_is_current(choice):
+        return jsonify({"status": "ok", "output": "Chart is up to date (log unchanged).\n"})
+
     try:
         result = subprocess.run(
             [str(BLACKBOX), opt],